@@ -1,67 +1,120 @@
 # data_loader.py
 import json
+import sys
+from functools import lru_cache
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Extrai (disciplina_id, turma_id) de uma oferta numa única chamada
+ids_da_oferta = itemgetter('disciplina_id', 'turma_id')
+
+# Categoria de cada valor de "tipo" conhecido no catálogo; outros valores caem na classificação por substring
+CATEGORIA_POR_TIPO = {
+    **{f"{n}º Período": "obrigatorias" for n in range(1, 13)},
+    "Disciplinas Optativas (Escolha Restrita)": "restritas",
+    "Disciplinas Optativas (Escolha Condicionada)": "condicionadas",
+    "Escolha Livre": "livres",
+}
+
+def categorizar_disciplina(disciplina):
+    """
+    Retorna a categoria da disciplina ("obrigatorias", "restritas", "condicionadas" ou "livres"), ou None.
+    """
+    tipo = disciplina.get("tipo", "")
+    categoria = CATEGORIA_POR_TIPO.get(tipo)
+    if categoria is not None:
+        return categoria
+
+    if "Período" in tipo:
+        return "obrigatorias"
+    elif "Escolha Restrita" in tipo:
+        return "restritas"
+    elif "Escolha Condicionada" in tipo:
+        return "condicionadas"
+    elif "Escolha Livre" in tipo or disciplina["id"].startswith("ARTIFICIAL"):
+        return "livres"
+    return None
+
+@lru_cache(maxsize=None)
+def parse_periodos(periodo):
+    """
+    Converte o campo "periodo" de uma oferta (ex.: "1, 2") no conjunto de períodos.
+    Há poucos valores distintos no catálogo, então cada um é convertido uma única vez.
+    """
+    return frozenset(int(p.strip()) for p in periodo.split(','))
+
+def ler_json(caminho):
+    """
+    Lê um arquivo JSON usando orjson quando disponível, com fallback para a biblioteca padrão.
+    """
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    if orjson is not None:
+        return orjson.loads(conteudo)
+    # json.loads aceita bytes e decodifica o UTF-8 diretamente em C
+    return json.loads(conteudo)
 
 def carregar_dados(caminho_disciplinas, caminho_ofertas):
     """
     Carrega os dados dos arquivos JSON, categoriza as disciplinas e realiza o pré-processamento.
     Retorna um dicionário contendo todas as estruturas de dados necessárias.
     """
-    with open(caminho_disciplinas, 'r', encoding='utf-8') as f:
-        disciplinas_data = json.load(f)
-    with open(caminho_ofertas, 'r', encoding='utf-8') as f:
-        ofertas_data = json.load(f)
+    disciplinas_data = ler_json(caminho_disciplinas)
+    ofertas_data = ler_json(caminho_ofertas)
 
-    # --- Categorizar disciplinas antes de filtrar ---
-    obrigatorias_ids = []
-    restritas_ids = []
-    condicionadas_ids = []
-    livres_ids = []
-
-    for d in disciplinas_data:
-        tipo = d.get("tipo", "")
-        if "Período" in tipo:
-            obrigatorias_ids.append(d["id"])
-        elif "Escolha Restrita" in tipo:
-            restritas_ids.append(d["id"])
-        elif "Escolha Condicionada" in tipo:
-            condicionadas_ids.append(d["id"])
-        elif "Escolha Livre" in tipo or d["id"].startswith("ARTIFICIAL"):
-            livres_ids.append(d["id"])
-
-    # Filtra as disciplinas para considerar apenas aquelas com ofertas
-    disciplinas_ofertadas_ids = {o['disciplina_id'] for o in ofertas_data}
-    disciplinas_filtradas = [d for d in disciplinas_data if d['id'] in disciplinas_ofertadas_ids]
-    disciplinas = {d['id']: d for d in disciplinas_filtradas}
-    print(f"Considerando {len(disciplinas)} disciplinas com ofertas disponíveis...")
-
-    # Mapeia turmas, horários e períodos
-    turmas_por_disciplina = {d_id: [] for d_id in disciplinas}
+    # Mapeia turmas, horários e períodos numa única passada pelas ofertas
+    turmas_ofertadas = {}
     horarios_por_turma = {}
     periodos_validos_por_disciplina = {}
 
     for oferta in ofertas_data:
-        d_id = oferta['disciplina_id']
-        t_id = oferta['turma_id']
-        
-        if d_id in turmas_por_disciplina:
-            turmas_por_disciplina[d_id].append(t_id)
-        
-        horarios_por_turma[t_id] = oferta.get('horario', [])
+        d_id, t_id = ids_da_oferta(oferta)
+        d_id = sys.intern(d_id)
+        t_id = sys.intern(t_id)
+
+        turmas_ofertadas.setdefault(d_id, []).append(t_id)
+
+        horarios_por_turma[t_id] = [sys.intern(h) for h in oferta.get('horario', [])]
 
         if 'periodo' in oferta and oferta['periodo']:
-            periodos = {int(p.strip()) for p in oferta['periodo'].split(',')}
+            periodos = parse_periodos(oferta['periodo'])
             if d_id not in periodos_validos_por_disciplina:
                 periodos_validos_por_disciplina[d_id] = set()
             periodos_validos_por_disciplina[d_id].update(periodos)
-    
+
+    # Considera apenas as disciplinas com ofertas, categorizando-as na mesma passada
+    disciplinas = {}
+    ids_por_categoria = {"obrigatorias": [], "restritas": [], "condicionadas": [], "livres": []}
+
+    # IDs e horários são internados: as mesmas strings se repetem como chaves e membros de conjuntos
+    # em todo o modelo, e strings internadas são comparadas por identidade
+    for d in disciplinas_data:
+        if d['id'] not in turmas_ofertadas:
+            continue
+        d['id'] = sys.intern(d['id'])
+        if 'prerequisitos' in d:
+            d['prerequisitos'] = [sys.intern(p) for p in d['prerequisitos']]
+        disciplinas[d['id']] = d
+
+        categoria = categorizar_disciplina(d)
+        if categoria is not None:
+            ids_por_categoria[categoria].append(d["id"])
+    print(f"Considerando {len(disciplinas)} disciplinas com ofertas disponíveis...")
+
+    turmas_por_disciplina = {d_id: turmas_ofertadas[d_id] for d_id in disciplinas}
+
     return {
         "disciplinas": disciplinas,
         "turmas_por_disciplina": turmas_por_disciplina,
         "horarios_por_turma": horarios_por_turma,
         "periodos_validos_por_disciplina": periodos_validos_por_disciplina,
         # --- Retorna as listas de IDs categorizados ---
-        "obrigatorias_ids": [d_id for d_id in obrigatorias_ids if d_id in disciplinas],
-        "restritas_ids": [d_id for d_id in restritas_ids if d_id in disciplinas],
-        "condicionadas_ids": [d_id for d_id in condicionadas_ids if d_id in disciplinas],
-        "livres_ids": [d_id for d_id in livres_ids if d_id in disciplinas]
+        "obrigatorias_ids": ids_por_categoria["obrigatorias"],
+        "restritas_ids": ids_por_categoria["restritas"],
+        "condicionadas_ids": ids_por_categoria["condicionadas"],
+        "livres_ids": ids_por_categoria["livres"]
     }
@@ -4,16 +4,32 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any
+from functools import lru_cache
+from contextlib import asynccontextmanager
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from data_loader import carregar_dados
-from optimizerSCIP import resolver_grade
-from ortools.linear_solver import pywraplp
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Na inicialização do servidor, carrega o OR-Tools (CP-SAT e SCIP), aquece o SCIP e pré-calcula os índices
+    do catálogo, para que a primeira chamada a /optimize não pague esse custo.
+    """
+    global indices_globais
+    if dados_globais:
+        import optimizerCPSAT  # noqa: F401 (só para carregar o módulo do CP-SAT)
+        from modelo_comum import preparar_indices
+        from ortools.linear_solver import pywraplp
+
+        pywraplp.Solver.CreateSolver('SCIP')
+        indices_globais = preparar_indices(dados_globais)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,14 +50,18 @@ except Exception as e:
     print(f"Error loading data: {e}")
     dados_globais = None
 
+# Preenchido no startup (lifespan); resolver_grade calcula os índices por conta própria se estiver vazio
+indices_globais = None
+
 class OptimizeRequest(BaseModel):
     taken_courses: List[str]
 
-@app.get("/disciplinas")
-def get_disciplinas():
-    if not dados_globais:
-        raise HTTPException(status_code=500, detail="Data not loaded")
-    
+@lru_cache(maxsize=1)
+def listar_disciplinas():
+    """
+    Monta a lista de disciplinas exposta pela API.
+    O catálogo é estático durante a vida do processo, então a lista é construída uma única vez.
+    """
     lista = []
     for d_id, d_info in dados_globais["disciplinas"].items():
         lista.append({
@@ -52,11 +72,23 @@ def get_disciplinas():
         })
     return lista
 
+@app.get("/disciplinas")
+def get_disciplinas() -> List[Dict[str, Any]]:
+    if not dados_globais:
+        raise HTTPException(status_code=500, detail="Data not loaded")
+    
+    return listar_disciplinas()
+
 @app.post("/optimize")
-def optimize_schedule(request: OptimizeRequest):
+def optimize_schedule(request: OptimizeRequest) -> Dict[str, Any]:
     if not dados_globais:
         raise HTTPException(status_code=500, detail="Data not loaded")
 
+    # Importação tardia: o OR-Tools é pesado e só é necessário ao otimizar
+    import optimizerCPSAT
+    import optimizerSCIP
+    from ortools.linear_solver import pywraplp
+
     NUM_SEMESTRES = 10
     CREDITOS_MAXIMOS_POR_SEMESTRE = 32
     CREDITOS_MINIMOS = {
@@ -65,13 +97,18 @@ def optimize_schedule(request: OptimizeRequest):
         "livre": 8
     }
 
-    grade, creditos, status, obj_value, creditos_por_tipo = resolver_grade(
-        dados_globais, 
-        CREDITOS_MINIMOS, 
-        NUM_SEMESTRES, 
-        CREDITOS_MAXIMOS_POR_SEMESTRE,
-        disciplinas_cursadas=request.taken_courses
-    )
+    # CP-SAT primeiro; se ele não chegar a uma conclusão (sem solução e sem provar inviabilidade), tenta o SCIP
+    for resolver_grade in (optimizerCPSAT.resolver_grade, optimizerSCIP.resolver_grade):
+        grade, creditos, status, obj_value, creditos_por_tipo = resolver_grade(
+            dados_globais, 
+            CREDITOS_MINIMOS, 
+            NUM_SEMESTRES, 
+            CREDITOS_MAXIMOS_POR_SEMESTRE,
+            disciplinas_cursadas=request.taken_courses,
+            indices=indices_globais
+        )
+        if status in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE, pywraplp.Solver.INFEASIBLE):
+            break
 
     if status == pywraplp.Solver.OPTIMAL or status == pywraplp.Solver.FEASIBLE:
         formatted_grade = []
@@ -0,0 +1,114 @@
+# modelo_comum.py
+# Partes do modelo da grade que não dependem do resolvedor, usadas por optimizerSCIP e optimizerCPSAT
+
+import math
+
+def preparar_indices(dados):
+    """
+    Pré-calcula as estruturas que dependem apenas do catálogo (e não das disciplinas já cursadas).
+    O resultado pode ser calculado uma vez e reutilizado em todas as chamadas de resolver_grade.
+    """
+    # Categoria de cada disciplina no relatório de créditos (demais caem em "Outros")
+    tipo_por_disciplina = {}
+    for d_id in dados["obrigatorias_ids"]: tipo_por_disciplina[d_id] = "Obrigatória"
+    for d_id in dados["restritas_ids"]: tipo_por_disciplina[d_id] = "Escolha Restrita"
+    for d_id in dados["condicionadas_ids"]: tipo_por_disciplina[d_id] = "Escolha Condicionada"
+    for d_id in dados["livres_ids"]: tipo_por_disciplina[d_id] = "Livre Escolha"
+
+    # Créditos convertidos para int uma única vez
+    creditos_int = {d_id: int(info.get('creditos', 0)) for d_id, info in dados["disciplinas"].items()}
+
+    # Turmas que viram variáveis de decisão. Descarta turmas repetidas em ofertas.json e turmas com
+    # exatamente os mesmos horários de uma turma anterior da mesma disciplina: escolher entre elas não
+    # muda a grade, só multiplica soluções simétricas para o solver explorar
+    turmas_candidatas = {}
+    for d_id, turmas in dados["turmas_por_disciplina"].items():
+        turma_por_horarios = {}
+        for t_id in turmas:
+            turma_por_horarios.setdefault(frozenset(dados["horarios_por_turma"].get(t_id, [])), t_id)
+        turmas_candidatas[d_id] = tuple(turma_por_horarios.values())
+
+    return {
+        "tipo_por_disciplina": tipo_por_disciplina,
+        "creditos_int": creditos_int,
+        "turmas_candidatas": turmas_candidatas
+    }
+
+def calcular_janela_de_semestres(dados, cursadas_set, obrigatorias_ativas, NUM_SEMESTRES):
+    """
+    Intervalo de semestres em que cada disciplina não cursada pode ser alocada, pela cadeia de pré-requisitos:
+    - mínimo: um depois do mínimo de cada pré-requisito pendente, na paridade em que a disciplina é ofertada;
+    - máximo: antes de todas as obrigatórias pendentes que dependem dela, direta ou indiretamente.
+    """
+    disciplinas = dados["disciplinas"]
+    periodos_validos_por_disciplina = dados["periodos_validos_por_disciplina"]
+    obrigatorias_set = frozenset(obrigatorias_ativas)
+
+    pendentes_por_disciplina = {}
+    dependentes_obrigatorias = {}
+    for d_id in disciplinas:
+        if d_id in cursadas_set:
+            continue
+        pendentes = [p for p in disciplinas[d_id].get('prerequisitos', []) if p in disciplinas and p not in cursadas_set]
+        pendentes_por_disciplina[d_id] = pendentes
+        if d_id in obrigatorias_set:
+            for p in pendentes:
+                dependentes_obrigatorias.setdefault(p, []).append(d_id)
+
+    # Os valores provisórios evitam recursão infinita se os dados tiverem um ciclo
+    semestre_minimo = {}
+    def minimo(d_id):
+        if d_id not in semestre_minimo:
+            semestre_minimo[d_id] = 1
+            s = 1 + max((minimo(p) for p in pendentes_por_disciplina[d_id]), default=0)
+            periodos_validos = periodos_validos_por_disciplina.get(d_id, {1, 2})
+            if (s % 2 != 0) != (1 in periodos_validos) and (1 in periodos_validos) != (2 in periodos_validos):
+                s += 1
+            semestre_minimo[d_id] = s
+        return semestre_minimo[d_id]
+
+    semestres_depois = {}
+    def depois(d_id):
+        if d_id not in semestres_depois:
+            semestres_depois[d_id] = 0
+            semestres_depois[d_id] = max((1 + depois(x) for x in dependentes_obrigatorias.get(d_id, [])), default=0)
+        return semestres_depois[d_id]
+
+    semestre_limite = {}
+    for d_id in pendentes_por_disciplina:
+        minimo(d_id)
+        semestre_limite[d_id] = NUM_SEMESTRES - depois(d_id)
+    return semestre_minimo, semestre_limite
+
+def calcular_semestres_minimos(dados, indices, creditos_minimos, cursadas_set, obrigatorias_ativas, semestre_minimo, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_SEMESTRE):
+    """
+    Limite inferior para o semestre máximo da grade.
+    """
+    creditos_int = indices["creditos_int"]
+
+    # Créditos que ainda precisam ser cursados (obrigatórias pendentes e o que falta dos mínimos de optativas)
+    # divididos pelo máximo de créditos por semestre
+    creditos_pendentes = sum(creditos_int[d_id] for d_id in obrigatorias_ativas)
+    for categoria, chave in (("restrita", "restritas_ids"), ("condicionada", "condicionadas_ids"), ("livre", "livres_ids")):
+        # Categoria sem disciplinas ofertadas não tem mínimo a cumprir (a R3 só é criada se houver disciplinas)
+        if not dados[chave]: continue
+        creditos_feitos = sum(creditos_int[d_id] for d_id in dados[chave] if d_id in cursadas_set)
+        creditos_pendentes += max(0, creditos_minimos[categoria] - creditos_feitos)
+    semestres_minimos = max(1, math.ceil(creditos_pendentes / CREDITOS_MAXIMOS_POR_SEMESTRE))
+
+    # Nenhuma obrigatória pendente termina antes do fim da sua cadeia de pré-requisitos
+    semestres_minimos = max([semestres_minimos] + [semestre_minimo[d_id] for d_id in obrigatorias_ativas])
+    return min(semestres_minimos, NUM_SEMESTRES)
+
+def creditos_acumulados_r7(ids, cursadas_set, alocacoes_por_disciplina, creditos_int, NUM_SEMESTRES):
+    """
+    Base da soma acumulada de créditos da R7: créditos já concluídos e os termos creditos * var
+    das alocações das disciplinas `ids`, agrupados por semestre ({s: [termo]}).
+    """
+    creditos_concluidos = sum(creditos_int[d_id] for d_id in cursadas_set if d_id in creditos_int)
+    termos = {s: [] for s in range(1, NUM_SEMESTRES + 1)}
+    for d_id in ids:
+        cred = creditos_int[d_id]
+        for s, _, var in alocacoes_por_disciplina.get(d_id, []):
+            termos[s].append(var * cred)
+    return creditos_concluidos, termos
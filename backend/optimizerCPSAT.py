@@ -0,0 +1,239 @@
+# optimizerCPSAT.py
+
+import math
+import os
+from itertools import chain
+
+from ortools.linear_solver import pywraplp
+from ortools.sat.python import cp_model
+
+from modelo_comum import calcular_janela_de_semestres, calcular_semestres_minimos, creditos_acumulados_r7, preparar_indices
+
+# Status do CP-SAT traduzidos para os códigos do pywraplp, para que os dois resolvedores sejam intercambiáveis
+STATUS_PYWRAPLP = {
+    cp_model.OPTIMAL: pywraplp.Solver.OPTIMAL,
+    cp_model.FEASIBLE: pywraplp.Solver.FEASIBLE,
+    cp_model.INFEASIBLE: pywraplp.Solver.INFEASIBLE,
+    cp_model.MODEL_INVALID: pywraplp.Solver.MODEL_INVALID,
+    cp_model.UNKNOWN: pywraplp.Solver.NOT_SOLVED,
+}
+
+def resolver_grade(dados, creditos_minimos, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_SEMESTRE, disciplinas_cursadas=None, indices=None):
+    """
+    Cria e resolve o modelo de otimização da grade horária usando o CP-SAT.
+    Mesma assinatura e mesmo retorno de optimizerSCIP.resolver_grade (status em códigos do pywraplp).
+    """
+    if disciplinas_cursadas is None:
+        disciplinas_cursadas = []
+    if indices is None:
+        indices = preparar_indices(dados)
+
+    # Set de IDs cursados para busca rápida
+    cursadas_set = frozenset(disciplinas_cursadas)
+
+    model = cp_model.CpModel()
+
+    # Extrai os dados
+    disciplinas = dados["disciplinas"]
+    horarios_por_turma = dados["horarios_por_turma"]
+    periodos_validos_por_disciplina = dados["periodos_validos_por_disciplina"]
+    obrigatorias_ids = dados["obrigatorias_ids"]
+    restritas_ids = dados["restritas_ids"]
+    condicionadas_ids = dados["condicionadas_ids"]
+    livres_ids = dados["livres_ids"]
+    ids_optativas = chain(restritas_ids, condicionadas_ids, livres_ids)
+
+    tipo_por_disciplina = indices["tipo_por_disciplina"]
+    creditos_int = indices["creditos_int"]
+    turmas_candidatas = indices["turmas_candidatas"]
+
+    # Disciplinas ainda não cursadas, filtradas uma única vez
+    ativas_ids = tuple(d_id for d_id in disciplinas if d_id not in cursadas_set)
+    obrigatorias_ativas = tuple(d_id for d_id in obrigatorias_ids if d_id not in cursadas_set)
+    optativas_ativas = tuple(d_id for d_id in ids_optativas if d_id not in cursadas_set)
+
+    # Semestres fora da janela permitida pela cadeia de pré-requisitos não recebem variáveis
+    semestre_minimo, semestre_limite = calcular_janela_de_semestres(dados, cursadas_set, obrigatorias_ativas, NUM_SEMESTRES)
+
+    # --- 3. Variáveis de Decisão ---
+    vars_por_disciplina = {}           # d_id -> [var]
+    alocacoes_por_disciplina = {}      # d_id -> [(s, t_id, var)]
+    vars_por_disciplina_semestre = {}  # (d_id, s) -> [var]
+    vars_por_semestre_horario = {}     # (s, horario) -> [var]
+
+    cursada_vars = {}
+    semestre_alocado = {}
+
+    for d_id in disciplinas:
+        if d_id in cursadas_set:
+            cursada_vars[d_id] = 1
+            continue
+
+        periodos_validos = periodos_validos_por_disciplina.get(d_id, {1, 2})
+        oferta_em_impar = 1 in periodos_validos
+        oferta_em_par = 2 in periodos_validos
+
+        for t_id in turmas_candidatas.get(d_id, ()):
+            for s in range(semestre_minimo[d_id], semestre_limite[d_id] + 1):
+                is_semestre_impar = (s % 2 != 0)
+                if (is_semestre_impar and oferta_em_impar) or (not is_semestre_impar and oferta_em_par):
+                    var = model.NewBoolVar(f'alocacao_{d_id}_s{s}_t{t_id}')
+                    vars_por_disciplina.setdefault(d_id, []).append(var)
+                    alocacoes_por_disciplina.setdefault(d_id, []).append((s, t_id, var))
+                    vars_por_disciplina_semestre.setdefault((d_id, s), []).append(var)
+                    for h in horarios_por_turma.get(t_id, []):
+                        vars_por_semestre_horario.setdefault((s, h), []).append(var)
+
+    # --- 4. Restrições ---
+    # R1.1: Obrigatórias (Exatamente uma vez)
+    for d_id in obrigatorias_ativas:
+        model.AddExactlyOne(vars_por_disciplina.get(d_id, []))
+
+    # R1.2: Optativas (No máximo uma vez)
+    for d_id in optativas_ativas:
+        model.AddAtMostOne(vars_por_disciplina.get(d_id, []))
+
+    # R2: Ligação
+    # cursada_vars[d] é um literal booleano (constante 1 para obrigatórias, já garantidas por R1.1),
+    # para que os pré-requisitos possam ser reificados em R4;
+    # semestre_alocado vale s se a disciplina for cursada no semestre s e 0 caso contrário
+    obrigatorias_ativas_set = frozenset(obrigatorias_ativas)
+    for d_id in ativas_ids:
+        alocacoes = alocacoes_por_disciplina.get(d_id, [])
+        vars_d = [var for _, _, var in alocacoes]
+        if d_id in obrigatorias_ativas_set:
+            cursada_var = model.NewConstant(1)
+        else:
+            cursada_var = model.NewBoolVar(f'cursada_{d_id}')
+            model.Add(cp_model.LinearExpr.Sum(vars_d) == cursada_var)
+        cursada_vars[d_id] = cursada_var
+        semestre_alocado[d_id] = cp_model.LinearExpr.WeightedSum(vars_d, [s for s, _, _ in alocacoes])
+
+    # R3: Créditos Mínimos
+    # Disciplinas já cursadas entram como constante no lado direito; as demais, por soma ponderada
+    for categoria, ids in (("restrita", restritas_ids), ("condicionada", condicionadas_ids), ("livre", livres_ids)):
+        if not ids:
+            continue
+        pendentes = [d_id for d_id in ids if d_id not in cursadas_set]
+        creditos_feitos = sum(creditos_int[d_id] for d_id in ids if d_id in cursadas_set)
+        model.Add(cp_model.LinearExpr.WeightedSum([cursada_vars[d_id] for d_id in pendentes],
+                                                  [creditos_int[d_id] for d_id in pendentes]) >= creditos_minimos[categoria] - creditos_feitos)
+
+    # R4: Pré-requisitos
+    # Reificados: só valem se d for cursada, sem constante big-M.
+    # Pré-requisitos já cursados estão no semestre 0 e são sempre satisfeitos
+    for d_id in ativas_ids:
+        var_d = cursada_vars[d_id]
+        for prereq_id in disciplinas[d_id].get('prerequisitos', []):
+            if prereq_id not in disciplinas or prereq_id in cursadas_set:
+                continue
+
+            model.AddImplication(var_d, cursada_vars[prereq_id])
+            model.Add(semestre_alocado[d_id] >= semestre_alocado[prereq_id] + 1).OnlyEnforceIf(var_d)
+
+    # R5: Conflitos de Horário
+    # Grupos com uma única turma não podem gerar conflito e não viram restrição
+    for turmas_conflitantes in vars_por_semestre_horario.values():
+        if len(turmas_conflitantes) > 1:
+            model.AddAtMostOne(turmas_conflitantes)
+
+    # R6: Limite de Créditos por Semestre
+    for s in range(1, NUM_SEMESTRES + 1):
+        vars_do_semestre = []
+        creditos_do_semestre = []
+        for d_id in ativas_ids:
+            for var in vars_por_disciplina_semestre.get((d_id, s), []):
+                vars_do_semestre.append(var)
+                creditos_do_semestre.append(creditos_int[d_id])
+        if vars_do_semestre:
+            model.Add(cp_model.LinearExpr.WeightedSum(vars_do_semestre, creditos_do_semestre) <= CREDITOS_MAXIMOS_POR_SEMESTRE)
+
+    # R7: Regras Específicas (Estágio) -> Estágio apenas após metade dos CRÉDITOS totais concluídos
+    id_estagio = "EEWU00"
+    if id_estagio in disciplinas and id_estagio not in cursadas_set:
+        total_creditos = sum(creditos_int.values())
+        # Os créditos concluídos são inteiros: ">= metade" equivale a ">= ceil(metade)"
+        metade_creditos = math.ceil(total_creditos / 2)
+        M_estagio = total_creditos + 1
+
+        # Contar CRÉDITOS concluídos ANTES do semestre s como soma acumulada: começa com as já cursadas
+        # e soma os créditos alocados no semestre s (exceto o próprio estágio) ao final de cada iteração
+        total_creditos_concluidos_antes_s, termos_credito_por_semestre = creditos_acumulados_r7(
+            (d_id for d_id in ativas_ids if d_id != id_estagio), cursadas_set, alocacoes_por_disciplina, creditos_int, NUM_SEMESTRES)
+
+        for s in range(1, NUM_SEMESTRES + 1):
+            vars_estagio_s = vars_por_disciplina_semestre.get((id_estagio, s), [])
+
+            if vars_estagio_s:
+                is_estagio_in_s = sum(vars_estagio_s)
+                model.Add(total_creditos_concluidos_antes_s >= metade_creditos - M_estagio * (1 - is_estagio_in_s))
+
+            total_creditos_concluidos_antes_s = total_creditos_concluidos_antes_s + sum(termos_credito_por_semestre[s])
+
+    # --- 5. Função Objetivo ---
+    # Minimizar o semestre máximo de TODAS as disciplinas CURSADAS (restrição de máximo nativa do CP-SAT)
+    semestres_minimos = calcular_semestres_minimos(dados, indices, creditos_minimos, cursadas_set, obrigatorias_ativas,
+                                                   semestre_minimo, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_SEMESTRE)
+
+    semestre_maximo = model.NewIntVar(1, NUM_SEMESTRES, 'semestre_maximo')
+    # A constante 1 mantém semestre_maximo >= 1 mesmo sem disciplinas pendentes, como no modelo SCIP
+    model.AddMaxEquality(semestre_maximo, [1] + [semestre_alocado[d_id] for d_id in ativas_ids])
+    # Limite inferior em restrição separada, fora do domínio da variável: pela igualdade acima, um limite
+    # no domínio empurraria disciplinas para semestres mais tardios em vez de só ajudar a poda
+    model.Add(semestre_maximo >= semestres_minimos)
+    model.Minimize(semestre_maximo)
+
+    # --- 6. Chamar o Solver ---
+    print(f"Número de variáveis: {len(model.proto.variables)}")
+    print(f"Número de restrições: {len(model.proto.constraints)}")
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = 120
+    solver.parameters.num_workers = os.cpu_count() or 1
+    status = STATUS_PYWRAPLP.get(solver.Solve(model), pywraplp.Solver.ABNORMAL)
+
+    # --- 7. Processar e Retornar os Resultados ---
+    if status == pywraplp.Solver.OPTIMAL or status == pywraplp.Solver.FEASIBLE:
+        grade = {s: [] for s in range(1, NUM_SEMESTRES + 1)}
+        creditos_por_semestre = {s: 0 for s in range(1, NUM_SEMESTRES + 1)}
+
+        # Estrutura para relatório de créditos
+        creditos_por_tipo = {
+            "Obrigatória": 0,
+            "Escolha Restrita": 0,
+            "Escolha Condicionada": 0,
+            "Livre Escolha": 0,
+            "Outros": 0
+        }
+
+        # Adicionar créditos das disciplinas JÁ cursadas
+        for d_id in cursadas_set:
+            if d_id in disciplinas:
+                creditos_por_tipo[tipo_por_disciplina.get(d_id, "Outros")] += creditos_int[d_id]
+
+        # Cada disciplina é alocada no máximo uma vez (R1): basta achar a primeira alocação ativa.
+        # Optativas não escolhidas são descartadas com uma única consulta ao literal cursada
+        for d_id in ativas_ids:
+            if not solver.BooleanValue(cursada_vars[d_id]):
+                continue
+            for s, t_id, var in alocacoes_por_disciplina.get(d_id, []):
+                if not solver.BooleanValue(var):
+                    continue
+
+                disc_data = disciplinas[d_id]
+                disciplina_obj = {
+                    "id": d_id,
+                    "nome": disc_data["nome"],
+                    "turma": t_id,
+                    "horarios": horarios_por_turma.get(t_id, []),
+                    "creditos": disc_data["creditos"],
+                    "tipo": disc_data.get("tipo", "Desconhecido")
+                }
+
+                grade[s].append(disciplina_obj)
+                creditos_por_semestre[s] += creditos_int[d_id]
+                creditos_por_tipo[tipo_por_disciplina.get(d_id, "Outros")] += creditos_int[d_id]
+                break
+
+        return grade, creditos_por_semestre, status, solver.ObjectiveValue(), creditos_por_tipo
+
+    return None, None, status, None, None
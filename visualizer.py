@@ -1,12 +1,29 @@
 # visualizer.py
 import re
+from functools import lru_cache
+
+# Formato de cada disciplina na grade: "Nome (Turma: X) --- Horários: [SEG-08-10, ...]"
+PADRAO_DISCIPLINA = re.compile(r'(.+?)\s\(Turma:\s(.*?)\)\s---\sHorários:\s\[(.*?)\]')
+
+@lru_cache(maxsize=1024)
+def separar_horario(horario):
+    """
+    Separa um horário "SEG-08-10" em ("SEG", "08-10"), ou retorna None se o formato for irregular.
+    Os mesmos horários se repetem entre disciplinas e semestres, então cada string é separada uma única vez.
+    """
+    try:
+        dia, inicio, fim = horario.split('-')
+    except ValueError:
+        return None
+    return dia, f"{inicio}-{fim}"
 
 def gerar_visualizacao_html(grade, creditos_por_semestre, nome_arquivo="grade_horaria.html"):
     """
     Gera um arquivo HTML com a grade horária formatada em tabelas de grade semanal.
     """
-    # Define o estilo CSS para a página, agora com estilos para a grade
-    html_content = """
+    # Define o estilo CSS para a página, agora com estilos para a grade.
+    # O HTML é montado em partes numa lista e unido uma única vez no final
+    html_content = ["""
     <html>
     <head>
         <title>Grade Horária Otimizada</title>
@@ -79,12 +96,15 @@ def gerar_visualizacao_html(grade, creditos_por_semestre, nome_arquivo="grade_ho
     <body>
         <div class="container">
             <h1>Grade Horária Otimizada</h1>
-    """
+    """]
 
     # --- LÓGICA DA GRADE SEMANAL ---
     DIAS = ["SEG", "TER", "QUA", "QUI", "SEX"]
     DIAS_DISPLAY = {"SEG": "Segunda-feira", "TER": "Terça-feira", "QUA": "Quarta-feira", "QUI": "Quinta-feira", "SEX": "Sexta-feira"}
     SLOTS_PADRAO = ["08-10", "10-12", "13-15", "15-17"]
+    # Conjuntos para os testes de pertinência; as listas acima definem a ordem das colunas e linhas
+    DIAS_VALIDOS = frozenset(DIAS)
+    SLOTS_VALIDOS = frozenset(SLOTS_PADRAO)
     SLOTS_DISPLAY = {
         "08-10": "08:00 - 10:00", "10-12": "10:00 - 12:00", 
         "13-15": "13:00 - 15:00", "15-17": "15:00 - 17:00"
@@ -95,58 +115,55 @@ def gerar_visualizacao_html(grade, creditos_por_semestre, nome_arquivo="grade_ho
         if not disciplinas_semestre:
             continue
 
-        html_content += f"<h2>Semestre {s} (Créditos: {creditos_por_semestre.get(s, 0)})</h2>\n"
+        html_content.append(f"<h2>Semestre {s} (Créditos: {creditos_por_semestre.get(s, 0)})</h2>\n")
         
         # Prepara a estrutura de dados da grade para o semestre atual
         grade_semestre = {slot: {dia: "" for dia in DIAS} for slot in SLOTS_PADRAO}
-        horarios_nao_padrao = []
+        horarios_nao_padrao = set()
 
         # Preenche a estrutura com as disciplinas alocadas
         for disciplina_str in sorted(disciplinas_semestre):
-            match = re.search(r'(.+?)\s\(Turma:\s(.*?)\)\s---\sHorários:\s\[(.*?)\]', disciplina_str)
+            match = PADRAO_DISCIPLINA.search(disciplina_str)
             if not match: continue
             
             nome, turma, horarios_str = match.groups()
             horarios = [h.strip() for h in horarios_str.split(',')]
 
             for horario in horarios:
-                try:
-                    dia, inicio, fim = horario.split('-')
-                    slot = f"{inicio}-{fim}"
-                    if dia in DIAS and slot in SLOTS_PADRAO:
-                        grade_semestre[slot][dia] = f"<b>{nome}</b><br><small>({turma})</small>"
-                    else:
-                        horarios_nao_padrao.append(f"{nome} ({turma}): {horario}")
-                except ValueError:
-                    horarios_nao_padrao.append(f"{nome} ({turma}): {horario}")
+                dia_slot = separar_horario(horario)
+                if dia_slot is not None and dia_slot[0] in DIAS_VALIDOS and dia_slot[1] in SLOTS_VALIDOS:
+                    dia, slot = dia_slot
+                    grade_semestre[slot][dia] = f"<b>{nome}</b><br><small>({turma})</small>"
+                else:
+                    horarios_nao_padrao.add(f"{nome} ({turma}): {horario}")
 
         # Gera a tabela HTML a partir da estrutura de dados preenchida
-        html_content += "<table class='grade-semanal'><thead><tr><th>Horário</th>"
+        html_content.append("<table class='grade-semanal'><thead><tr><th>Horário</th>")
         for dia in DIAS:
-            html_content += f"<th>{DIAS_DISPLAY[dia]}</th>"
-        html_content += "</tr></thead><tbody>"
+            html_content.append(f"<th>{DIAS_DISPLAY[dia]}</th>")
+        html_content.append("</tr></thead><tbody>")
 
         for slot in SLOTS_PADRAO:
-            html_content += f"<tr><td class='horario-label'>{SLOTS_DISPLAY[slot]}</td>"
+            html_content.append(f"<tr><td class='horario-label'>{SLOTS_DISPLAY[slot]}</td>")
             for dia in DIAS:
                 cell_content = grade_semestre[slot][dia]
                 cell_class = "materia-cell" if cell_content else ""
-                html_content += f"<td class='{cell_class}'>{cell_content}</td>"
-            html_content += "</tr>"
+                html_content.append(f"<td class='{cell_class}'>{cell_content}</td>")
+            html_content.append("</tr>")
         
-        html_content += "</tbody></table>"
+        html_content.append("</tbody></table>")
 
         # Se houver horários não padronizados, lista-os abaixo da tabela
         if horarios_nao_padrao:
-            html_content += "<div class='notas'><strong>Horários não padronizados ou com formato irregular:</strong><ul>"
-            for item in sorted(list(set(horarios_nao_padrao))):
-                html_content += f"<li>{item}</li>"
-            html_content += "</ul></div>"
+            html_content.append("<div class='notas'><strong>Horários não padronizados ou com formato irregular:</strong><ul>")
+            for item in sorted(horarios_nao_padrao):
+                html_content.append(f"<li>{item}</li>")
+            html_content.append("</ul></div>")
 
-    html_content += "</div></body></html>"
+    html_content.append("</div></body></html>")
     
     with open(nome_arquivo, "w", encoding="utf-8") as f:
-        f.write(html_content)
+        f.write("".join(html_content))
     
     print("-" * 50)
     print(f"\n✅ Visualização da grade foi salva no arquivo: '{nome_arquivo}'")